@@ -0,0 +1,88 @@
+"""
+Benchmark for the message classification stage.
+
+Measures the cost of classify_message() + find_violation() per message type,
+using real telegram.Message objects built from sample updates.
+
+Usage:
+    python benchmark_classifier.py --iterations 100000
+"""
+
+import time
+import argparse
+from telegram import Message
+
+from message_classifier import classify_message, find_violation
+
+BASE_MESSAGE = {
+    'message_id': 1,
+    'date': 0,
+    'chat': {'id': -1001000000000, 'type': 'supergroup', 'title': 'Benchmark'},
+    'from': {'id': 2000000000, 'is_bot': False, 'first_name': 'User'}
+}
+
+SAMPLES = {
+    'plain text': {'text': "Hello everyone, how is it going today?"},
+    'text link': {'text': "Join now https://spam.example/offer for free crypto"},
+    'hidden link': {
+        'text': "Click here for the offer",
+        'entities': [{'type': 'text_link', 'offset': 0, 'length': 10, 'url': 'https://spam.example'}]
+    },
+    'forward (user)': {
+        'text': "Forwarded text",
+        'forward_origin': {'type': 'user', 'date': 0,
+                           'sender_user': {'id': 3, 'is_bot': False, 'first_name': 'Other'}}
+    },
+    'forward (channel)': {
+        'text': "Channel post",
+        'forward_origin': {'type': 'channel', 'date': 0, 'message_id': 7,
+                           'chat': {'id': -1002000000000, 'type': 'channel', 'title': 'Channel'}}
+    },
+    'photo + caption': {
+        'photo': [{'file_id': 'a', 'file_unique_id': 'b', 'width': 90, 'height': 90}],
+        'caption': "Nice picture"
+    },
+    'sticker': {
+        'sticker': {'file_id': 'a', 'file_unique_id': 'b', 'width': 512, 'height': 512,
+                    'is_animated': False, 'is_video': False, 'type': 'regular'}
+    },
+    'link button': {
+        'text': "Check this out",
+        'reply_markup': {'inline_keyboard': [[{'text': 'Open', 'url': 'https://spam.example'}]]}
+    },
+    'via bot': {
+        'text': "Inline result",
+        'via_bot': {'id': 9, 'is_bot': True, 'first_name': 'InlineBot'}
+    }
+}
+
+
+def benchmark(message: Message, iterations: int) -> float:
+    """Return the average classification cost in microseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        find_violation(classify_message(message))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the message classification stage.")
+    parser.add_argument('--iterations', type=int, default=100000, help="Classifications per sample")
+    args = parser.parse_args()
+
+    print(f"{'sample':<20} {'result':<12} {'us/msg':>8} {'msgs/s':>12}")
+    total = 0.0
+    for name, fields in SAMPLES.items():
+        message = Message.de_json({**BASE_MESSAGE, **fields}, None)
+        violation = find_violation(classify_message(message))
+        cost = benchmark(message, args.iterations)
+        total += cost
+        result = violation['type'] if violation else 'allowed'
+        print(f"{name:<20} {result:<12} {cost:>8.2f} {1e6 / cost:>12,.0f}")
+
+    average = total / len(SAMPLES)
+    print(f"{'average':<20} {'':<12} {average:>8.2f} {1e6 / average:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark for sharded mode: single-process bot.py vs 1 and N workers.
+
+Runs load_test.py once as the single-process baseline, then for each worker
+count starts sharded_bot.py against the fake Bot API server, offers the same
+load and reports removal throughput and latency.
+
+By default API calls get no added latency and the offered load is above what
+one process can handle, so the bot is CPU-bound and the numbers show scaling
+with cores. Each worker processes updates one at a time, so with --latency > 0
+extra workers also overlap API waits and gain throughput even on a single core.
+
+Usage:
+    python benchmark_sharding.py --workers 1,4 --chats 20 --rate 10
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+from fake_bot_api import run_server
+from load_test import LOAD_TEST_TOKEN, control, ms, wait_for_server
+from sharded_bot import run_sharded
+
+
+def run_sharded_quiet(token: str, base_url: str, workers: int, store_path: str):
+    """Run sharded mode with a short poll timeout, no event journal and quiet logs."""
+    run_sharded(token, base_url, workers, store_path, poll_timeout=1, journal=False,
+                log_level="WARNING")
+
+
+def benchmark(base: str, workers: int, chats: int, rate: float, duration: float,
+              warmup: float) -> dict:
+    store_dir = tempfile.mkdtemp(prefix="shard-bench-")
+    runner = multiprocessing.Process(
+        target=run_sharded_quiet,
+        args=(LOAD_TEST_TOKEN, f"{base}/bot", workers, os.path.join(store_dir, "state.sqlite3"))
+    )
+    runner.start()
+    try:
+        # Give the workers time to start before offering load
+        time.sleep(warmup)
+        control(base, 'start', {'chats': chats, 'rate': rate})
+        time.sleep(duration)
+        return control(base, 'stop')
+    finally:
+        runner.terminate()
+        runner.join()
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def benchmark_single_process(port: int, chats: int, rate: float, duration: float,
+                             latency: float) -> dict:
+    """Run load_test.py (plain bot.py, one process) with the same load as the baseline."""
+    results_dir = tempfile.mkdtemp(prefix="shard-bench-")
+    results_path = os.path.join(results_dir, "single.json")
+    try:
+        subprocess.run(
+            [sys.executable, "load_test.py", "--chats", str(chats), "--rates", str(rate),
+             "--duration", str(duration), "--cooldown", "0", "--port", str(port),
+             "--latency", str(latency), "--json", results_path],
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True, stdout=subprocess.DEVNULL
+        )
+        with open(results_path) as f:
+            return [result for result in json.load(f) if 'rate' in result][0]
+    finally:
+        shutil.rmtree(results_dir, ignore_errors=True)
+
+
+def print_row(mode: str, result: dict):
+    print(
+        f"{mode:>10} {result['throughput']:>10.1f} {result['outstanding']:>8} "
+        f"{ms(result['latency_p50']):>8} {ms(result['latency_p90']):>8} "
+        f"{ms(result['latency_p99']):>8}",
+        flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sharded mode with 1 and N workers.")
+    parser.add_argument('--workers', default=f"1,{max(os.cpu_count() or 4, 2)}", help="Comma-separated worker counts")
+    parser.add_argument('--chats', type=int, default=20, help="Number of chats (N)")
+    parser.add_argument('--rate', type=float, default=10.0, help="Messages/sec per chat (M)")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load per run")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds to let workers start")
+    parser.add_argument('--port', type=int, default=8082, help="Port for the fake Bot API server")
+    parser.add_argument('--latency', type=float, default=0.0, help="Added latency per action call (seconds)")
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"Offered load: {args.chats} chats x {args.rate:g} msgs/s = {args.chats * args.rate:g} msgs/s, "
+          f"API latency {args.latency * 1000:g}ms")
+    print(f"{'mode':>10} {'removed/s':>10} {'backlog':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    print_row("single", benchmark_single_process(
+        args.port + 1, args.chats, args.rate, args.duration, args.latency
+    ))
+
+    base = f"http://127.0.0.1:{args.port}"
+    server = multiprocessing.Process(
+        target=run_server, args=('127.0.0.1', args.port, args.latency, 0.0, 0.0), daemon=True
+    )
+    server.start()
+    try:
+        wait_for_server(base)
+        for workers in [int(value) for value in args.workers.split(',')]:
+            result = benchmark(base, workers, args.chats, args.rate, args.duration, args.warmup)
+            print_row(f"sharded-{workers}", result)
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,33 @@
+from __future__ import annotations
+
 import os
+import signal
 import logging
 import asyncio
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from profiling import StartupTimer, is_profile_running, profile_event_loop
+
+# Started before the remaining imports so they are included in the timings
+startup_timer = StartupTimer()
+
 from dotenv import load_dotenv
-from spam_filter import spam_filter
+from spam_filter import get_spam_filter
+from message_classifier import (
+    classify_message, find_violation, POLICY_DELETE, POLICY_WARN,
+    VIOLATION_FORWARDED, VIOLATION_LINK, VIOLATION_CAPTION, VIOLATION_BUTTON,
+    VIOLATION_VIA_BOT, VIOLATION_MEDIA
+)
+from shared_store import MemoryStore
+from event_journal import EventJournal, EVENT_DELETE, EVENT_WARNING, EVENT_BAN, EVENT_FORWARDED_BLOCK
 from config import *
 
+# The telegram stack is only needed for type hints here; it is imported when
+# the Application is built, after the token has been checked
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import Application, ContextTypes
+
 # Load environment variables
 load_dotenv()
 
@@ -18,27 +39,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Warning tracking system (in-memory storage)
-user_warnings = {}  # {user_id: warning_count}
+# Warning and admin state (in-memory unless a worker process swaps in a shared store)
+store = MemoryStore()
 
 def get_user_warnings(user_id: int) -> int:
     """Get warning count for a user."""
-    return user_warnings.get(user_id, 0)
+    return store.get_warnings(user_id)
 
-def add_user_warning(user_id: int) -> int:
-    """Add a warning for a user and return new count."""
-    current_warnings = get_user_warnings(user_id)
-    user_warnings[user_id] = current_warnings + 1
-    return user_warnings[user_id]
+def add_user_warning(user_id: int, count: int = 1) -> int:
+    """Add warnings for a user and return new count."""
+    return store.add_warnings(user_id, count)
 
 def clear_user_warnings(user_id: int):
     """Clear warnings for a user."""
-    if user_id in user_warnings:
-        del user_warnings[user_id]
+    store.clear_warnings(user_id)
 
 def reset_all_warnings():
     """Reset all user warnings."""
-    user_warnings.clear()
+    store.reset_warnings()
+
+async def get_member_status(bot, chat_id: int, user_id: int) -> str:
+    """Get a user's chat member status, cached for ADMIN_STATUS_CACHE_TTL seconds."""
+    if ADMIN_STATUS_CACHE_TTL > 0:
+        status = store.get_member_status(chat_id, user_id, ADMIN_STATUS_CACHE_TTL)
+        if status is not None:
+            return status
+    chat_member = await bot.get_chat_member(chat_id, user_id)
+    if ADMIN_STATUS_CACHE_TTL > 0:
+        store.set_member_status(chat_id, user_id, chat_member.status, ADMIN_STATUS_CACHE_TTL)
+    return chat_member.status
+
+# Moderation event journal (opened on first use; worker processes point it at their own directory)
+journal_dir = JOURNAL_DIR if ENABLE_EVENT_JOURNAL else None
+event_journal = None
+
+def get_event_journal():
+    """Return the event journal, opening it on first use, or None if disabled."""
+    global event_journal
+    if event_journal is None and journal_dir:
+        event_journal = EventJournal(
+            journal_dir, JOURNAL_SEGMENT_MAX_BYTES, JOURNAL_STATS_FLUSH_EVERY, JOURNAL_STATS_RETENTION_DAYS
+        )
+    return event_journal
+
+def record_event(event_type: str, chat_id: int, user_id: int = None, **details):
+    """Record a moderation event in the journal, if enabled."""
+    journal = get_event_journal()
+    if journal is None:
+        return
+    try:
+        journal.record(event_type, chat_id, user_id, **details)
+    except Exception as e:
+        logger.error(f"Error writing event journal: {e}")
 
 # Admin commands
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -62,12 +114,14 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /start - Start the bot
 /help - Show this help message
 /status - Show bot status
+/stats - Show moderation statistics for this chat
 /ban @username - Ban a user
 /unban @username - Unban a user
 /warn @username - Manually warn a user ⭐ NEW!
 /clear_warnings - Clear all warnings ⭐ NEW!
 /check_warnings @username - Check user warnings ⭐ NEW!
 /toggle_forwarded_blocking - Toggle forwarded message blocking
+/profile [seconds] - Record a CPU/memory profile (bot operators only, if enabled)
 
 <b>Bot Features:</b>
 • Automatically detects spam links
@@ -81,6 +135,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 <b>Spam Detection:</b>
 • URL links (with exceptions)
+• Hidden links and link buttons
 • Money-making schemes
 • Investment scams
 • Adult content
@@ -107,7 +162,14 @@ Made with ❤️ for your group safety!
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show bot status."""
+    from http_pools import get_pool_stats
+    
     chat_id = update.effective_chat.id
+    pool_lines = "\n".join(
+        f"{name.title()}: avg {pool['avg_wait'] * 1000:.1f}ms, "
+        f"max {pool['max_wait'] * 1000:.1f}ms, {pool['timeouts']} timeouts"
+        for name, pool in get_pool_stats().items()
+    )
     status_text = f"""
 📊 <b>Bot Status:</b>
 
@@ -123,12 +185,53 @@ Auto-Delete: ✅ ({BAN_MESSAGE_DELETE_DELAY}s)
 <b>Warning System Settings:</b>
 Max Warnings: {MAX_WARNINGS_BEFORE_BAN}
 Warning Delete Delay: {WARNING_MESSAGE_DELETE_DELAY}s
-Current Active Warnings: {len(user_warnings)} users
+Current Active Warnings: {store.count_warned_users()} users
+
+<b>Connection Pool Wait:</b>
+{pool_lines}
 
 Bot is running and protecting your group! 🛡️
     """
     await update.message.reply_html(status_text)
 
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show moderation statistics for this chat from the event journal."""
+    # Check if user is admin
+    chat_member = await context.bot.get_chat_member(
+        update.effective_chat.id, update.effective_user.id
+    )
+    if chat_member.status not in ['creator', 'administrator']:
+        await update.message.reply_text(
+            "❌ You need admin privileges to use this command."
+        )
+        return
+    
+    journal = get_event_journal()
+    if journal is None:
+        await update.message.reply_text("❌ Event journal is disabled in config.py.")
+        return
+    
+    chat_id = update.effective_chat.id
+    today = journal.get_chat_stats(chat_id, days=1)
+    week = journal.get_chat_stats(chat_id, days=7)
+    total = journal.get_chat_stats(chat_id)
+    
+    def row(label: str, counts: dict) -> str:
+        return (
+            f"<b>{label}:</b> {counts[EVENT_DELETE]} deleted, "
+            f"{counts[EVENT_WARNING]} warnings, {counts[EVENT_BAN]} bans, "
+            f"{counts[EVENT_FORWARDED_BLOCK]} forwards blocked"
+        )
+    
+    stats_text = f"""
+📈 <b>Moderation Stats:</b>
+
+{row('Today', today)}
+{row('Last 7 days', week)}
+{row('All time', total)}
+    """
+    await update.message.reply_html(stats_text)
+
 async def delete_message_after_delay(bot, chat_id: int, message_id: int, delay: int = 5):
     """Delete a message after a specified delay."""
     try:
@@ -138,13 +241,97 @@ async def delete_message_after_delay(bot, chat_id: int, message_id: int, delay:
     except Exception as e:
         logger.error(f"Error auto-deleting message: {e}")
 
+def classify_violation(message) -> dict:
+    """Classify a message and return the violation its policies flag, if any."""
+    if message is None:
+        return None
+    return find_violation(classify_message(message))
+
+# Notice templates per violation type; other types use the CONTENT_* templates
+NOTICE_TEMPLATES = {VIOLATION_FORWARDED: FORWARDED_MESSAGE_WARNING}
+WARNING_TEMPLATES = {
+    VIOLATION_LINK: LINK_WARNING_MESSAGE,
+    VIOLATION_CAPTION: CAPTION_LINK_WARNING_MESSAGE,
+    VIOLATION_BUTTON: LINK_WARNING_MESSAGE
+}
+BAN_TEMPLATES = {
+    VIOLATION_LINK: BAN_MESSAGE,
+    VIOLATION_CAPTION: CAPTION_BAN_MESSAGE,
+    VIOLATION_BUTTON: BAN_MESSAGE
+}
+CONTENT_LABELS = {
+    VIOLATION_FORWARDED: "forwarded messages",
+    VIOLATION_LINK: "links",
+    VIOLATION_CAPTION: "links in captions",
+    VIOLATION_BUTTON: "link buttons",
+    VIOLATION_VIA_BOT: "inline bot messages"
+}
+
+def format_notice(templates: dict, default: str, violation: dict, user, **kwargs) -> str:
+    """Fill in the notice template for a violation."""
+    if violation['type'] == VIOLATION_MEDIA:
+        content = f"{violation['media_type'].replace('_', ' ')} messages"
+    else:
+        content = CONTENT_LABELS[violation['type']]
+    template = templates.get(violation['type'], default)
+    return template.format(user=user.mention_html(), content=content, **kwargs)
+
+async def send_auto_deleting_notice(bot, chat_id: int, text: str, delay: int):
+    """Send an HTML notice and schedule its deletion."""
+    sent_message = await bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML')
+    asyncio.create_task(
+        delete_message_after_delay(bot, chat_id, sent_message.message_id, delay)
+    )
+
+async def warn_or_ban(bot, chat_id: int, user, violation: dict, count: int = 1,
+                      notify: bool = True) -> str:
+    """Add warnings for a violation and ban at the limit (or at once without the warning system).
+    
+    Returns EVENT_WARNING or EVENT_BAN.
+    """
+    if USE_WARNING_SYSTEM:
+        warning_count = add_user_warning(user.id, count)
+        
+        if warning_count < MAX_WARNINGS_BEFORE_BAN:
+            record_event(EVENT_WARNING, chat_id, user.id, warnings=warning_count, source=violation['type'])
+            if notify:
+                await send_auto_deleting_notice(
+                    bot, chat_id,
+                    format_notice(
+                        WARNING_TEMPLATES, CONTENT_WARNING_MESSAGE, violation, user,
+                        warning_count=warning_count, max_warnings=MAX_WARNINGS_BEFORE_BAN
+                    ),
+                    WARNING_MESSAGE_DELETE_DELAY
+                )
+            logger.info(f"User {user.id} got warning {warning_count}/{MAX_WARNINGS_BEFORE_BAN} ({violation['type']}) in chat {chat_id}")
+            return EVENT_WARNING
+        
+        # Ban user after max warnings
+        await bot.ban_chat_member(chat_id, user.id)
+        record_event(EVENT_BAN, chat_id, user.id, warnings=warning_count, source=violation['type'])
+        clear_user_warnings(user.id)
+        delay = WARNING_MESSAGE_DELETE_DELAY
+        logger.info(f"User {user.id} banned after {warning_count} warnings ({violation['type']}) in chat {chat_id}")
+    else:
+        # Old system - immediate ban
+        await bot.ban_chat_member(chat_id, user.id)
+        record_event(EVENT_BAN, chat_id, user.id, source=violation['type'])
+        delay = BAN_MESSAGE_DELETE_DELAY
+        logger.info(f"User {user.id} banned for {violation['type']} in chat {chat_id}")
+    
+    if notify:
+        await send_auto_deleting_notice(
+            bot, chat_id, format_notice(BAN_TEMPLATES, CONTENT_BAN_MESSAGE, violation, user), delay
+        )
+    return EVENT_BAN
+
 def is_spam_message(text: str) -> bool:
     """Check if a message contains spam patterns."""
     if not text:
         return False
     
     # Use advanced spam filter
-    analysis = spam_filter.analyze_message(text)
+    analysis = get_spam_filter().analyze_message(text)
     return analysis['is_spam']
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -154,188 +341,36 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     
     # Skip if message is from bot or admin
-    if user.is_bot:
+    if user is None or user.is_bot:
+        return
+    
+    # Classify first, so allowed messages cost no API calls
+    violation = classify_violation(message)
+    if violation is None:
         return
     
     # Check if user is admin
-    chat_member = await context.bot.get_chat_member(chat.id, user.id)
-    if chat_member.status in ['creator', 'administrator']:
+    if await get_member_status(context.bot, chat.id, user.id) in ['creator', 'administrator']:
         return  # Allow admin messages
     
-    # Check for forwarded messages (NEW FEATURE)
-    if ENABLE_FORWARDED_MESSAGE_BLOCKING and message.forward_from:
-        try:
-            # Delete the forwarded message
-            await message.delete()
-            
-            # Send warning message
-            warning_msg = FORWARDED_MESSAGE_WARNING.format(user=user.mention_html())
-            sent_message = await context.bot.send_message(
-                chat_id=chat.id,
-                text=warning_msg,
-                parse_mode='HTML'
-            )
-            
-            # Auto-delete warning message after configured delay
-            asyncio.create_task(
-                delete_message_after_delay(
-                    context.bot, chat.id, sent_message.message_id, 
-                    FORWARDED_MESSAGE_DELETE_DELAY
-                )
+    try:
+        await message.delete()
+        event_type = EVENT_FORWARDED_BLOCK if violation['type'] == VIOLATION_FORWARDED else EVENT_DELETE
+        record_event(event_type, chat.id, user.id, message_id=message.message_id, source=violation['type'])
+        
+        if violation['policy'] == POLICY_DELETE:
+            # Remove with a notice only, no warning
+            await send_auto_deleting_notice(
+                context.bot, chat.id,
+                format_notice(NOTICE_TEMPLATES, CONTENT_NOTICE_MESSAGE, violation, user),
+                FORWARDED_MESSAGE_DELETE_DELAY
             )
-            
-            logger.info(f"Deleted forwarded message from user {user.id} in chat {chat.id}")
-            
-        except Exception as e:
-            logger.error(f"Error handling forwarded message: {e}")
-        return  # Exit after handling forwarded message
-    
-    # Check for links in text messages
-    if message.text and len(spam_filter.extract_urls(message.text)) > 0:
-        try:
-            # Delete the message
-            await message.delete()
-            
-            if USE_WARNING_SYSTEM:
-                # Add warning to user
-                warning_count = add_user_warning(user.id)
-                
-                # Check if user should be banned
-                if warning_count >= MAX_WARNINGS_BEFORE_BAN:
-                    # Ban user after max warnings
-                    await context.bot.ban_chat_member(chat.id, user.id)
-                    ban_msg = BAN_MESSAGE.format(user=user.mention_html())
-                    
-                    sent_message = await context.bot.send_message(
-                        chat_id=chat.id,
-                        text=ban_msg,
-                        parse_mode='HTML'
-                    )
-                    
-                    # Clear warnings after ban
-                    clear_user_warnings(user.id)
-                    
-                    logger.info(f"User {user.id} banned after {warning_count} warnings in chat {chat.id}")
-                    
-                else:
-                    # Send warning message
-                    warning_msg = LINK_WARNING_MESSAGE.format(
-                        user=user.mention_html(),
-                        warning_count=warning_count,
-                        max_warnings=MAX_WARNINGS_BEFORE_BAN
-                    )
-                    
-                    sent_message = await context.bot.send_message(
-                        chat_id=chat.id,
-                        text=warning_msg,
-                        parse_mode='HTML'
-                    )
-                    
-                    logger.info(f"User {user.id} got warning {warning_count}/{MAX_WARNINGS_BEFORE_BAN} in chat {chat.id}")
-                
-                # Auto-delete warning/ban message
-                asyncio.create_task(
-                    delete_message_after_delay(
-                        context.bot, chat.id, sent_message.message_id, 
-                        WARNING_MESSAGE_DELETE_DELAY
-                    )
-                )
-                
-            else:
-                # Old system - immediate ban
-                await context.bot.ban_chat_member(chat.id, user.id)
-                ban_msg = BAN_MESSAGE.format(user=user.mention_html())
-                
-                sent_message = await context.bot.send_message(
-                    chat_id=chat.id,
-                    text=ban_msg,
-                    parse_mode='HTML'
-                )
-                
-                asyncio.create_task(
-                    delete_message_after_delay(
-                        context.bot, chat.id, sent_message.message_id, 
-                        BAN_MESSAGE_DELETE_DELAY
-                    )
-                )
-                
-                logger.info(f"User {user.id} banned for sharing links in chat {chat.id}")
-            
-        except Exception as e:
-            logger.error(f"Error handling link message: {e}")
+            logger.info(f"Deleted {violation['type']} message from user {user.id} in chat {chat.id}")
+        else:
+            await warn_or_ban(context.bot, chat.id, user, violation)
     
-    # Check for links in captions
-    elif message.caption and len(spam_filter.extract_urls(message.caption)) > 0:
-        try:
-            await message.delete()
-            
-            if USE_WARNING_SYSTEM:
-                # Add warning to user
-                warning_count = add_user_warning(user.id)
-                
-                # Check if user should be banned
-                if warning_count >= MAX_WARNINGS_BEFORE_BAN:
-                    # Ban user after max warnings
-                    await context.bot.ban_chat_member(chat.id, user.id)
-                    ban_msg = CAPTION_BAN_MESSAGE.format(user=user.mention_html())
-                    
-                    sent_message = await context.bot.send_message(
-                        chat_id=chat.id,
-                        text=ban_msg,
-                        parse_mode='HTML'
-                    )
-                    
-                    # Clear warnings after ban
-                    clear_user_warnings(user.id)
-                    
-                    logger.info(f"User {user.id} banned after {warning_count} warnings (caption) in chat {chat.id}")
-                    
-                else:
-                    # Send warning message
-                    warning_msg = CAPTION_LINK_WARNING_MESSAGE.format(
-                        user=user.mention_html(),
-                        warning_count=warning_count,
-                        max_warnings=MAX_WARNINGS_BEFORE_BAN
-                    )
-                    
-                    sent_message = await context.bot.send_message(
-                        chat_id=chat.id,
-                        text=warning_msg,
-                        parse_mode='HTML'
-                    )
-                    
-                    logger.info(f"User {user.id} got warning {warning_count}/{MAX_WARNINGS_BEFORE_BAN} (caption) in chat {chat.id}")
-                
-                # Auto-delete warning/ban message
-                asyncio.create_task(
-                    delete_message_after_delay(
-                        context.bot, chat.id, sent_message.message_id, 
-                        WARNING_MESSAGE_DELETE_DELAY
-                    )
-                )
-                
-            else:
-                # Old system - immediate ban
-                await context.bot.ban_chat_member(chat.id, user.id)
-                ban_msg = CAPTION_BAN_MESSAGE.format(user=user.mention_html())
-                
-                sent_message = await context.bot.send_message(
-                    chat_id=chat.id,
-                    text=ban_msg,
-                    parse_mode='HTML'
-                )
-                
-                asyncio.create_task(
-                    delete_message_after_delay(
-                        context.bot, chat.id, sent_message.message_id, 
-                        BAN_MESSAGE_DELETE_DELAY
-                    )
-                )
-                
-                logger.info(f"User {user.id} banned for sharing links in caption in chat {chat.id}")
-            
-        except Exception as e:
-            logger.error(f"Error handling link caption: {e}")
+    except Exception as e:
+        logger.error(f"Error handling {violation['type']} message: {e}")
 
 async def ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Ban a user from the group."""
@@ -354,6 +389,7 @@ async def ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Get user by username
         user = await context.bot.get_chat(username)
         await context.bot.ban_chat_member(update.effective_chat.id, user.id)
+        record_event(EVENT_BAN, update.effective_chat.id, user.id, admin_id=update.effective_user.id)
         await update.message.reply_text(f"✅ {username} has been banned from the group.")
     except Exception as e:
         await update.message.reply_text(f"❌ Error banning user: {e}")
@@ -399,6 +435,10 @@ async def warn_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Get user by username
         user = await context.bot.get_chat(username)
         warning_count = add_user_warning(user.id)
+        record_event(
+            EVENT_WARNING, update.effective_chat.id, user.id,
+            warnings=warning_count, admin_id=update.effective_user.id
+        )
         
         warning_msg = LINK_WARNING_MESSAGE.format(
             user=user.mention_html(),
@@ -522,34 +562,330 @@ Then restart the bot.
     await update.message.reply_html(status_text)
 
 
-def main():
-    """Start the bot."""
-    # Get token from config or environment variable
+async def moderate_backlog_user(bot, chat_id: int, user, violations: list):
+    """Apply one merged warning or ban decision for a user's backlog violations."""
+    warn_violations = [violation for violation, _ in violations if violation['policy'] == POLICY_WARN]
+    newest = max(message.date for _, message in violations)
+    age = (datetime.now(timezone.utc) - newest).total_seconds()
+    notify = age <= CATCH_UP_STALE_NOTICE_AGE
+    
+    if not warn_violations:
+        # Notice-only violations: deletion is enough, as in live mode
+        if notify:
+            await send_auto_deleting_notice(
+                bot, chat_id,
+                format_notice(NOTICE_TEMPLATES, CONTENT_NOTICE_MESSAGE, violations[-1][0], user),
+                FORWARDED_MESSAGE_DELETE_DELAY
+            )
+        return None
+    
+    return await warn_or_ban(
+        bot, chat_id, user, warn_violations[-1], count=len(warn_violations), notify=notify
+    )
+
+async def fetch_backlog(bot) -> list:
+    """Fetch and acknowledge the updates that queued up while the bot was offline."""
+    from telegram import Update
+    
+    backlog = []
+    # A getUpdates call with an offset acknowledges every update before it.
+    # Only acknowledged updates are handled here; the rest stay with Telegram
+    # and reach the normal handlers through polling, so nothing runs twice.
+    acknowledged = 0
+    offset = None
+    try:
+        while len(backlog) < CATCH_UP_MAX_UPDATES:
+            updates = await bot.get_updates(
+                offset=offset, limit=100, timeout=0, allowed_updates=Update.ALL_TYPES
+            )
+            acknowledged = len(backlog)
+            backlog.extend(updates)
+            if len(updates) < 100:
+                break
+            offset = updates[-1].update_id + 1
+        if backlog:
+            # Confirm the fetched updates so polling starts after them
+            await bot.get_updates(offset=backlog[-1].update_id + 1, limit=1, timeout=0)
+            acknowledged = len(backlog)
+    except Exception as e:
+        logger.error(
+            f"Error fetching backlog, leaving {len(backlog) - acknowledged} unconfirmed updates to polling: {e}"
+        )
+    
+    return backlog[:acknowledged]
+
+async def delete_backlog_chunk(bot, chat_id: int, message_ids: list) -> bool:
+    """Bulk delete messages, waiting out flood control up to CATCH_UP_DELETE_ATTEMPTS times."""
+    from telegram.error import RetryAfter
+    
+    for attempt in range(1, CATCH_UP_DELETE_ATTEMPTS + 1):
+        try:
+            await bot.delete_messages(chat_id, message_ids)
+            return True
+        except RetryAfter as e:
+            if attempt == CATCH_UP_DELETE_ATTEMPTS:
+                logger.error(f"Flood control while bulk deleting in chat {chat_id}, giving up after {attempt} attempts")
+                break
+            logger.warning(f"Flood control while bulk deleting in chat {chat_id}, retrying in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            logger.error(f"Error bulk deleting {len(message_ids)} messages in chat {chat_id}: {e}")
+            break
+    return False
+
+def is_claimed_by_other_handler(application: Application, update: Update) -> bool:
+    """Check whether a handler other than handle_message (e.g. a command) would take an update."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if handler.callback is not handle_message and handler.check_update(update):
+                return True
+    return False
+
+async def moderate_backlog(application: Application, backlog: list):
+    """Process a fetched backlog in bulk.
+    
+    The whole backlog is classified first. Violating messages are then removed
+    per chat with bulk deleteMessages calls, and repeated violations by one
+    user are merged into a single warning or ban decision. Everything else
+    goes through the normal handlers.
+    """
+    if not backlog:
+        return
+    
+    bot = application.bot
+    start_time = asyncio.get_running_loop().time()
+    logger.info(f"Catching up on {len(backlog)} pending updates...")
+    
+    # Detect violations for the whole backlog in one pass
+    violations = {}  # {chat_id: {user_id: [(violation, message)]}}
+    updates_by_message = {}  # {(chat_id, message_id): update}
+    other_updates = []
+    for update in backlog:
+        message = update.message
+        user = update.effective_user
+        violation = None
+        # Commands run live before handle_message sees them, so they must not count as violations here
+        if user and not user.is_bot and not is_claimed_by_other_handler(application, update):
+            violation = classify_violation(message)
+        if violation is None:
+            other_updates.append(update)
+            continue
+        violations.setdefault(message.chat_id, {}).setdefault(user.id, []).append((violation, message))
+        updates_by_message[(message.chat_id, message.message_id)] = update
+    
+    deleted = warned = banned = 0
+    for chat_id, users in violations.items():
+        try:
+            admins = await bot.get_chat_administrators(chat_id)
+        except Exception as e:
+            logger.error(f"Error fetching admins for chat {chat_id}, handling its backlog live: {e}")
+            for items in users.values():
+                other_updates.extend(updates_by_message[(chat_id, message.message_id)] for _, message in items)
+            continue
+        admin_ids = {admin.user.id for admin in admins}
+        # Admin messages go through the normal handlers, as they would live
+        for user_id in admin_ids & users.keys():
+            other_updates.extend(updates_by_message[(chat_id, message.message_id)] for _, message in users[user_id])
+        users = {user_id: items for user_id, items in users.items() if user_id not in admin_ids}
+        
+        # Bulk delete, at most 100 messages per call
+        message_ids = [message.message_id for items in users.values() for _, message in items]
+        deleted_ids = set()
+        for i in range(0, len(message_ids), 100):
+            chunk = message_ids[i:i + 100]
+            if await delete_backlog_chunk(bot, chat_id, chunk):
+                deleted_ids.update(chunk)
+            else:
+                # Already acknowledged, so polling will not deliver them again; delete them one by one
+                other_updates.extend(updates_by_message[(chat_id, message_id)] for message_id in chunk)
+        deleted += len(deleted_ids)
+        
+        # Messages that are still visible are neither journaled nor counted as violations here
+        users = {
+            user_id: [(violation, message) for violation, message in items if message.message_id in deleted_ids]
+            for user_id, items in users.items()
+        }
+        users = {user_id: items for user_id, items in users.items() if items}
+        
+        for user_id, items in users.items():
+            for violation, message in items:
+                event_type = EVENT_FORWARDED_BLOCK if violation['type'] == VIOLATION_FORWARDED else EVENT_DELETE
+                record_event(event_type, chat_id, user_id, message_id=message.message_id, source='catch_up')
+        
+        # Decisions for different users are independent, so run them concurrently
+        decisions = await asyncio.gather(
+            *(moderate_backlog_user(bot, chat_id, items[0][1].from_user, items)
+              for items in users.values()),
+            return_exceptions=True
+        )
+        for user_id, decision in zip(users, decisions):
+            if isinstance(decision, Exception):
+                logger.error(f"Error moderating backlog for user {user_id} in chat {chat_id}: {decision}")
+            elif decision == EVENT_WARNING:
+                warned += 1
+            elif decision == EVENT_BAN:
+                banned += 1
+    
+    for update in sorted(other_updates, key=lambda u: u.update_id):
+        await application.process_update(update)
+    
+    elapsed = asyncio.get_running_loop().time() - start_time
+    logger.info(
+        f"Caught up on {len(backlog)} updates in {elapsed:.2f}s: deleted {deleted} messages "
+        f"in {len(violations)} chats, {warned} warnings, {banned} bans; switching to live mode"
+    )
+
+async def catch_up_backlog(application: Application):
+    """Process the updates that queued up while the bot was offline.
+    
+    Polling takes over once the backlog is drained.
+    """
+    if not ENABLE_CATCH_UP:
+        return
+    await moderate_backlog(application, await fetch_backlog(application.bot))
+
+async def run_profile(duration: float) -> dict:
+    """Profile the live event loop and log where the results were written."""
+    logger.info(f"Profiling event loop for {duration:g}s...")
+    paths = await profile_event_loop(
+        duration, PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES
+    )
+    logger.info(f"Profile written: {', '.join(paths.values())}")
+    return paths
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Record a CPU and memory profile of the running bot."""
+    # Profiling is a host-wide operator action, so group admins are not enough
+    if update.effective_user.id not in ADMIN_IDS:
+        await update.message.reply_text(
+            "❌ Only bot operators (ADMIN_IDS in config.py) can use this command."
+        )
+        return
+    
+    if not ENABLE_PROFILING:
+        await update.message.reply_text("❌ Profiling is disabled. Set ENABLE_PROFILING = True in config.py.")
+        return
+    
+    try:
+        duration = float(context.args[0]) if context.args else PROFILE_DEFAULT_DURATION
+    except ValueError:
+        await update.message.reply_text("Usage: /profile [seconds]")
+        return
+    duration = max(1.0, min(duration, PROFILE_MAX_DURATION))
+    
+    if is_profile_running():
+        await update.message.reply_text("❌ A profile is already running.")
+        return
+    
+    await update.message.reply_text(f"⏱️ Profiling for {duration:g} seconds...")
+    # Run in the background so updates keep being processed (and profiled)
+    context.application.create_task(
+        report_profile(context.bot, update.effective_chat.id, duration)
+    )
+
+async def report_profile(bot, chat_id: int, duration: float):
+    """Run a profile and send the written file paths to the chat."""
+    try:
+        paths = await run_profile(duration)
+    except Exception as e:
+        logger.error(f"Error profiling: {e}")
+        await bot.send_message(chat_id=chat_id, text=f"❌ Error profiling: {e}")
+        return
+    
+    files = "\n".join(f"• {path}" for path in paths.values())
+    await bot.send_message(chat_id=chat_id, text=f"✅ Profile written on the bot host:\n{files}")
+
+def log_profile_error(task: asyncio.Task):
+    """Log the outcome of a signal-triggered profile."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error profiling: {task.exception()}")
+
+def start_profile_from_signal():
+    """Signal handler: profile for PROFILE_DEFAULT_DURATION seconds."""
+    if is_profile_running():
+        logger.warning("Profile already running, ignoring SIGUSR1")
+        return
+    task = asyncio.create_task(run_profile(PROFILE_DEFAULT_DURATION))
+    task.add_done_callback(log_profile_error)
+
+async def post_init(application: Application):
+    """Runs once the Application is initialized, before polling starts."""
+    startup_timer.mark("initialize")
+    
+    if ENABLE_PROFILING and hasattr(signal, 'SIGUSR1'):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, start_profile_from_signal)
+        logger.info(f"Profiling enabled: send SIGUSR1 to pid {os.getpid()} or use /profile")
+    
+    await catch_up_backlog(application)
+    startup_timer.mark("catch-up")
+    logger.info(f"Startup timings: {startup_timer.summary()}")
+
+def get_token() -> str:
+    """Get token from config or environment variable, or None if not set."""
     token = BOT_TOKEN if BOT_TOKEN != "your_bot_token_here" else os.getenv('TELEGRAM_BOT_TOKEN')
     if not token or token == "your_bot_token_here":
         logger.error("No token provided! Set BOT_TOKEN in config.py or TELEGRAM_BOT_TOKEN environment variable.")
+        return None
+    return token
+
+def main():
+    """Start the bot."""
+    startup_timer.mark("module import")
+    token = get_token()
+    if not token:
         return
+    startup_timer.mark("token check")
+    
+    application = build_application(token)
+    
+    # Start the bot
+    from telegram import Update
+    logger.info("Starting bot...")
+    application.run_polling(allowed_updates=Update.ALL_TYPES)
     
-    # Create the Application
-    application = Application.builder().token(token).build()
+    if event_journal is not None:
+        event_journal.close()
+
+def build_application(token: str, base_url: str = None, polling: bool = True) -> Application:
+    """Create the Application and register all handlers.
+    
+    With polling=False the Application gets no Updater; updates are fed to it
+    by the caller (see sharded_bot.py).
+    """
+    from telegram.ext import Application, CommandHandler, MessageHandler, filters
+    from http_pools import build_requests
+    startup_timer.mark("telegram import")
+    
+    action_request, updates_request = build_requests()
+    builder = Application.builder().token(token).request(action_request)
+    if polling:
+        builder = builder.get_updates_request(updates_request).post_init(post_init)
+    else:
+        builder = builder.updater(None)
+    if base_url:
+        builder = builder.base_url(base_url)
+    application = builder.build()
     
     # Add handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("status", status))
+    application.add_handler(CommandHandler("stats", stats_command))
     application.add_handler(CommandHandler("ban", ban_user))
     application.add_handler(CommandHandler("unban", unban_user))
     application.add_handler(CommandHandler("warn", warn_user))
     application.add_handler(CommandHandler("clear_warnings", clear_warnings))
     application.add_handler(CommandHandler("check_warnings", check_warnings))
     application.add_handler(CommandHandler("toggle_forwarded_blocking", toggle_forwarded_blocking))
+    application.add_handler(CommandHandler("profile", profile_command))
     
     # Add message handler for spam filtering
-    application.add_handler(MessageHandler(filters.TEXT | filters.CAPTION, handle_message))
+    application.add_handler(MessageHandler(
+        filters.UpdateType.MESSAGE & ~filters.StatusUpdate.ALL, handle_message
+    ))
     
-    # Start the bot
-    logger.info("Starting bot...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    startup_timer.mark("application build")
+    return application
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
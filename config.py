@@ -28,10 +28,84 @@ BLOCK_FORWARDED_MESSAGES = True  # Block all forwarded messages
 # Seconds before auto-deleting notifications
 FORWARDED_MESSAGE_DELETE_DELAY = 5
 
+# Message Type Policies
+# "allow", "delete" (remove and post a notice) or "warn" (remove and count a warning)
+FORWARDED_MESSAGE_POLICY = "delete"  # Forwards from users, hidden users, chats and channels
+LINK_POLICY = "warn"  # Links in text or captions, including hidden text links
+BUTTON_LINK_POLICY = "warn"  # Inline keyboard buttons that open a URL
+VIA_BOT_POLICY = "allow"  # Messages sent through inline bots
+MEDIA_POLICIES: dict[str, str] = {  # Media types not listed here are allowed
+    'photo': "allow",
+    'video': "allow",
+    'animation': "allow",
+    'audio': "allow",
+    'document': "allow",
+    'sticker': "allow",
+    'voice': "allow",
+    'video_note': "allow",
+    'contact': "allow",
+    'location': "allow",
+    'venue': "allow",
+    'poll': "allow",
+    'dice': "allow",
+    'game': "allow",
+    'story': "allow",
+}
+
+# Catch-up Settings (backlog that queued up while the bot was offline)
+ENABLE_CATCH_UP = True  # Process the backlog in bulk before live polling
+CATCH_UP_MAX_UPDATES = 10000  # Stop catching up after this many updates
+CATCH_UP_STALE_NOTICE_AGE = 300  # Skip warning/ban notices for violations older than this (seconds)
+CATCH_UP_DELETE_ATTEMPTS = 3  # Tries per bulk delete on flood control before deleting one by one
+
+# Admin Status Cache
+ADMIN_STATUS_CACHE_TTL = 60  # Seconds to reuse a getChatMember result (0 = always ask Telegram)
+
+# Sharded Mode Settings (python sharded_bot.py)
+SHARD_WORKERS = 4  # Worker processes; updates are routed to them by chat ID
+SHARD_STORE_PATH = "bot_state.sqlite3"  # Shared warning/admin state for the workers
+SHARD_POLL_TIMEOUT = 10  # Long-poll timeout of the ingress process (seconds)
+
+# HTTP Connection Pool Settings
+HTTP_VERSION = "1.1"  # "1.1" or "2" (HTTP/2 needs python-telegram-bot[http2])
+POOL_WAIT_WARNING_THRESHOLD = 0.5  # Log a warning if a request waits longer for a connection
+
+# Pool for moderation calls (deleteMessage, banChatMember, sendMessage, ...)
+ACTION_POOL_SIZE = 64  # Max concurrent connections
+ACTION_KEEPALIVE_CONNECTIONS = 32  # Idle connections kept open
+ACTION_KEEPALIVE_EXPIRY = 30.0  # Seconds an idle connection is kept open
+ACTION_CONNECT_TIMEOUT = 5.0
+ACTION_READ_TIMEOUT = 5.0
+ACTION_WRITE_TIMEOUT = 5.0
+ACTION_POOL_TIMEOUT = 5.0  # Max seconds to wait for a free connection
+
+# Pool for long-poll getUpdates (kept separate so actions never wait on it)
+UPDATES_POOL_SIZE = 1
+UPDATES_KEEPALIVE_EXPIRY = 60.0
+UPDATES_CONNECT_TIMEOUT = 5.0
+UPDATES_READ_TIMEOUT = 5.0  # Added on top of the long-poll timeout
+UPDATES_WRITE_TIMEOUT = 5.0
+UPDATES_POOL_TIMEOUT = 1.0
+
+# Profiling Settings
+ENABLE_PROFILING = False  # Allow /profile (ADMIN_IDS only) and SIGUSR1 to profile the running bot
+PROFILE_DIR = "profiles"  # Where profiles are written
+PROFILE_DEFAULT_DURATION = 30  # Seconds to profile when no duration is given
+PROFILE_MAX_DURATION = 300  # Upper limit for /profile <seconds>
+PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds of CPU time between stack samples
+PROFILE_TRACEMALLOC_FRAMES = 10  # Stack depth recorded per allocation
+
 # Logging Settings
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
 LOG_FILE = "bot.log"
 
+# Event Journal Settings
+ENABLE_EVENT_JOURNAL = True  # Record deletes, warnings and bans to disk
+JOURNAL_DIR = "journal"  # Directory for journal segments and index
+JOURNAL_SEGMENT_MAX_BYTES = 4 * 1024 * 1024  # Roll over to a new segment at this size
+JOURNAL_STATS_FLUSH_EVERY = 20  # Persist /stats aggregates every N events
+JOURNAL_STATS_RETENTION_DAYS = 7  # Keep per-day /stats counters this long (all-time totals are kept)
+
 # Message Templates
 BAN_MESSAGE = (
     "🚫 {user} has been banned for sharing links.\n\n"
@@ -55,6 +129,18 @@ CAPTION_LINK_WARNING_MESSAGE = (
     "Warning {warning_count}/{max_warnings}. "
     "You will be banned after {max_warnings} warnings."
 )
+CONTENT_NOTICE_MESSAGE = (
+    "⚠️ {user}, {content} are not allowed in this group."
+)
+CONTENT_WARNING_MESSAGE = (
+    "⚠️ {user}, {content} are not allowed in this group.\n\n"
+    "Warning {warning_count}/{max_warnings}. "
+    "You will be banned after {max_warnings} warnings."
+)
+CONTENT_BAN_MESSAGE = (
+    "🚫 {user} has been banned for posting {content}.\n\n"
+    "Please follow the group rules."
+)
 
 # Auto-delete settings
 BAN_MESSAGE_DELETE_DELAY = 5  # Seconds before auto-deleting ban messages
@@ -0,0 +1,241 @@
+"""
+Append-only Moderation Event Journal
+"""
+
+import os
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Event types written by the bot
+EVENT_DELETE = "delete"
+EVENT_WARNING = "warning"
+EVENT_BAN = "ban"
+EVENT_FORWARDED_BLOCK = "forwarded_block"
+
+EVENT_TYPES = [EVENT_DELETE, EVENT_WARNING, EVENT_BAN, EVENT_FORWARDED_BLOCK]
+
+INDEX_FILE = "index.json"
+STATS_FILE = "stats.json"
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+
+# Layout of stats.json; files written in an older layout are rebuilt from the journal
+STATS_VERSION = 2
+
+
+def segment_name(number: int) -> str:
+    """Build the file name of a journal segment."""
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def day_key(timestamp: float) -> str:
+    """Return the UTC day (YYYY-MM-DD) a timestamp falls on."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def load_index(directory: str) -> List[Dict]:
+    """Load the segment time index of a journal directory."""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write JSON to a file through a temporary file and rename."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class EventJournal:
+    """Append-only JSONL journal of moderation events.
+
+    Events are appended to numbered segment files which roll over once they
+    reach ``segment_max_bytes``. ``index.json`` records the time range and
+    event count of every segment, and ``stats.json`` holds per-chat counters
+    that are updated as events are written, so /stats never has to scan the
+    journal. Each chat keeps an all-time total plus per-day counters for the
+    last ``stats_retention_days`` days; older day buckets are dropped so the
+    file stays small.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 4 * 1024 * 1024,
+                 stats_flush_every: int = 20, stats_retention_days: int = 7):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.stats_flush_every = stats_flush_every
+        self.stats_retention_days = stats_retention_days
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = load_index(directory)
+        self.stats = {'version': STATS_VERSION, 'chats': {}, 'segment': None, 'offset': 0}
+        self._pending = 0
+        self._cutoff = self._retention_cutoff()
+        self._latest_day = ''
+        self._load_stats()
+
+        if not self.index:
+            self.index.append(self._new_index_entry(1))
+            self._write_index()
+
+        self._file = open(self._segment_path(self.index[-1]['segment']), 'ab')
+        self._catch_up_stats()
+
+    # Internal helpers
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _new_index_entry(self, number: int) -> Dict:
+        return {
+            'segment': segment_name(number),
+            'number': number,
+            'first_ts': None,
+            'last_ts': None,
+            'count': 0
+        }
+
+    def _write_index(self):
+        write_json_atomic(os.path.join(self.directory, INDEX_FILE), self.index)
+
+    def _load_stats(self):
+        path = os.path.join(self.directory, STATS_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            if stats.get('version') == STATS_VERSION:
+                self.stats = stats
+
+    def _flush_stats(self):
+        self.stats['segment'] = self.index[-1]['segment']
+        self.stats['offset'] = self._file.tell()
+        write_json_atomic(os.path.join(self.directory, STATS_FILE), self.stats)
+        self._pending = 0
+
+    def _retention_cutoff(self) -> str:
+        """Return the oldest day whose counters are kept."""
+        return day_key(time.time() - (self.stats_retention_days - 1) * 86400)
+
+    def _prune_days(self):
+        """Drop day buckets that fell out of the retention window."""
+        self._cutoff = self._retention_cutoff()
+        for chat in self.stats['chats'].values():
+            for day in [day for day in chat['days'] if day < self._cutoff]:
+                del chat['days'][day]
+
+    def _apply(self, event: Dict):
+        """Add an event to the in-memory aggregates."""
+        chat = self.stats['chats'].setdefault(str(event['chat_id']), {'total': {}, 'days': {}})
+        chat['total'][event['type']] = chat['total'].get(event['type'], 0) + 1
+
+        key = day_key(event['ts'])
+        if key > self._latest_day:
+            # First event of a new day; age out the old buckets
+            self._latest_day = key
+            self._prune_days()
+        if key >= self._cutoff:
+            day = chat['days'].setdefault(key, {})
+            day[event['type']] = day.get(event['type'], 0) + 1
+
+    def _catch_up_stats(self):
+        """Replay events written after the last stats flush (e.g. after a crash)."""
+        names = [entry['segment'] for entry in self.index]
+        start = self.stats.get('segment')
+        if start in names:
+            position = names.index(start)
+            offset = self.stats.get('offset', 0)
+        else:
+            position = 0
+            offset = 0
+            self.stats = {'version': STATS_VERSION, 'chats': {}, 'segment': None, 'offset': 0}
+
+        replayed = 0
+        for name in names[position:]:
+            path = self._segment_path(name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Partial write at crash time
+                    try:
+                        self._apply(json.loads(line))
+                        replayed += 1
+                    except ValueError:
+                        continue
+            offset = 0
+
+        self._prune_days()
+        if replayed or self.stats.get('segment') != names[-1]:
+            self._flush_stats()
+
+    def _rotate(self):
+        self._file.close()
+        self.index.append(self._new_index_entry(self.index[-1]['number'] + 1))
+        self._write_index()
+        self._file = open(self._segment_path(self.index[-1]['segment']), 'ab')
+        self._flush_stats()
+
+    # Public API
+
+    def record(self, event_type: str, chat_id: int, user_id: Optional[int] = None,
+               **details) -> Dict:
+        """Append an event to the journal and update the aggregates."""
+        event = {'ts': time.time(), 'type': event_type, 'chat_id': chat_id}
+        if user_id is not None:
+            event['user_id'] = user_id
+        event.update(details)
+
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n"
+        self._file.write(line.encode('utf-8'))
+        self._file.flush()
+
+        entry = self.index[-1]
+        new_segment = entry['first_ts'] is None
+        if new_segment:
+            entry['first_ts'] = event['ts']
+        entry['last_ts'] = event['ts']
+        entry['count'] += 1
+        self._apply(event)
+        self._pending += 1
+
+        if self._file.tell() >= self.segment_max_bytes:
+            self._rotate()
+        elif new_segment or self._pending >= self.stats_flush_every:
+            self._write_index()
+            self._flush_stats()
+
+        return event
+
+    def get_chat_stats(self, chat_id: int, days: Optional[int] = None) -> Dict[str, int]:
+        """Return event counts for a chat, optionally limited to the last N days.
+
+        Windows longer than ``stats_retention_days`` only cover the retained days.
+        """
+        chat = self.stats['chats'].get(str(chat_id), {'total': {}, 'days': {}})
+        totals = {event_type: 0 for event_type in EVENT_TYPES}
+        if days is None:
+            totals.update(chat['total'])
+            return totals
+
+        cutoff = day_key(time.time() - (days - 1) * 86400)
+        for day, counts in chat['days'].items():
+            if day < cutoff:
+                continue
+            for event_type, count in counts.items():
+                totals[event_type] = totals.get(event_type, 0) + count
+        return totals
+
+    def close(self):
+        """Flush index and aggregates and close the active segment."""
+        if self._file.closed:
+            return
+        self._write_index()
+        self._flush_stats()
+        self._file.close()
@@ -0,0 +1,336 @@
+"""
+Local stand-in for the Telegram Bot API, used for load testing.
+
+Serves getUpdates, deleteMessage, banChatMember, sendMessage and getChatMember
+(plus the handful of calls the bot makes at startup) over plain HTTP, with
+configurable latency and 429 injection. It also generates traffic: N chats
+posting link messages at M messages/sec, and measures how long it takes the
+bot to delete each one.
+
+Control endpoints (not part of the Bot API):
+    POST /_control/start   {"chats": N, "rate": M, "users_per_chat": U}
+    POST /_control/stop    -> returns the measurements for the run
+    POST /_control/backlog {"chats": N, "messages": M} queues M messages per
+                           chat at once, as if posted while the bot was down
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+BOT_USER = {
+    'id': 1000000001,
+    'is_bot': True,
+    'first_name': 'LoadTestBot',
+    'username': 'load_test_bot',
+    'can_join_groups': True,
+    'can_read_all_group_messages': True,
+    'supports_inline_queries': False
+}
+
+# Methods subject to latency and 429 injection
+ACTION_METHODS = {
+    'deleteMessage', 'deleteMessages', 'banChatMember', 'sendMessage',
+    'getChatMember', 'getChatAdministrators'
+}
+
+SPAM_TEXTS = [
+    "Join now https://spam.example/offer",
+    "Free crypto t.me/free_crypto_now",
+    "Earn money fast bit.ly/3xyz",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Return the pct-th percentile of values (nearest rank)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class FakeBotAPI:
+    """Minimal asyncio HTTP server speaking enough of the Bot API for the bot."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 retry_after: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+
+        self.updates: List[Dict] = []
+        self.next_update_id = 1
+        self.next_message_id: Dict[int, int] = {}
+        self.new_updates = asyncio.Event()
+        self.generator: Optional[asyncio.Task] = None
+        self._reset_measurements()
+
+    def _reset_measurements(self):
+        self.pending: Dict[Tuple[int, int], float] = {}  # (chat_id, message_id) -> created
+        self.latencies: List[float] = []
+        self.generated = 0
+        self.calls: Dict[str, int] = {}
+        self.injected_429 = 0
+        self.started_at = time.monotonic()
+
+    # Traffic generation
+
+    def _message_id(self, chat_id: int) -> int:
+        self.next_message_id[chat_id] = self.next_message_id.get(chat_id, 0) + 1
+        return self.next_message_id[chat_id]
+
+    def _push_update(self, chat_id: int, user_id: int, text: str):
+        message_id = self._message_id(chat_id)
+        self.updates.append({
+            'update_id': self.next_update_id,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'supergroup', 'title': f'Load chat {chat_id}'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'},
+                'text': text
+            }
+        })
+        self.next_update_id += 1
+        self.pending[(chat_id, message_id)] = time.monotonic()
+        self.generated += 1
+        self.new_updates.set()
+
+    async def _generate(self, chats: int, rate: float, users_per_chat: int):
+        """Post `rate` messages/sec into each of `chats` chats."""
+        chat_ids = [-1001000000000 - i for i in range(chats)]
+        interval = 1.0 / (rate * chats)
+        next_at = time.monotonic()
+        sent = 0
+        while True:
+            chat_id = chat_ids[sent % chats]
+            user_id = 2000000000 + abs(chat_id) % 100000 * 1000 + random.randrange(users_per_chat)
+            self._push_update(chat_id, user_id, random.choice(SPAM_TEXTS))
+            sent += 1
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def queue_backlog(self, chats: int, messages: int, users_per_chat: int = 50):
+        """Queue a backlog of messages in one go, without a running generator."""
+        self.stop_load()
+        self._reset_measurements()
+        for i in range(messages * chats):
+            chat_id = -1001000000000 - i % chats
+            user_id = 2000000000 + abs(chat_id) % 100000 * 1000 + random.randrange(users_per_chat)
+            self._push_update(chat_id, user_id, random.choice(SPAM_TEXTS))
+
+    def start_load(self, chats: int, rate: float, users_per_chat: int = 50):
+        self.stop_load()
+        self._reset_measurements()
+        # Drop anything left undelivered by a previous run
+        self.updates = []
+        self.generator = asyncio.create_task(self._generate(chats, rate, users_per_chat))
+
+    def stop_load(self) -> Dict:
+        if self.generator is not None:
+            self.generator.cancel()
+            self.generator = None
+        elapsed = time.monotonic() - self.started_at
+        removed = len(self.latencies)
+        return {
+            'elapsed': elapsed,
+            'generated': self.generated,
+            'removed': removed,
+            'outstanding': len(self.pending),
+            'throughput': removed / elapsed if elapsed else 0.0,
+            'latency_p50': percentile(self.latencies, 50),
+            'latency_p90': percentile(self.latencies, 90),
+            'latency_p99': percentile(self.latencies, 99),
+            'latency_max': max(self.latencies) if self.latencies else None,
+            'calls': dict(self.calls),
+            'injected_429': self.injected_429
+        }
+
+    # Bot API methods
+
+    async def get_updates(self, params: Dict):
+        offset = int(params.get('offset', 0) or 0)
+        limit = int(params.get('limit', 100) or 100)
+        timeout = float(params.get('timeout', 0) or 0)
+
+        # Drop confirmed updates
+        if offset:
+            self.updates = [u for u in self.updates if u['update_id'] >= offset]
+
+        if not self.updates and timeout > 0:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    def send_message(self, params: Dict):
+        chat_id = int(params['chat_id'])
+        return {
+            'message_id': self._message_id(chat_id),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': f'Load chat {chat_id}'},
+            'from': BOT_USER,
+            'text': params.get('text', '')
+        }
+
+    def delete_message(self, params: Dict):
+        chat_id = int(params['chat_id'])
+        message_ids = params['message_ids'] if 'message_ids' in params else [params['message_id']]
+        now = time.monotonic()
+        for message_id in message_ids:
+            created = self.pending.pop((chat_id, int(message_id)), None)
+            if created is not None:
+                self.latencies.append(now - created)
+        return True
+
+    def get_chat_member(self, params: Dict):
+        user_id = int(params['user_id'])
+        return {
+            'status': 'member',
+            'user': {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+        }
+
+    async def call(self, method: str, params: Dict) -> Tuple[int, Dict]:
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method in ACTION_METHODS:
+            if self.latency or self.jitter:
+                await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+            if self.error_rate and random.random() < self.error_rate:
+                self.injected_429 += 1
+                return 429, {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.retry_after}',
+                    'parameters': {'retry_after': self.retry_after}
+                }
+
+        if method == 'getUpdates':
+            result = await self.get_updates(params)
+        elif method == 'getMe':
+            result = BOT_USER
+        elif method == 'sendMessage':
+            result = self.send_message(params)
+        elif method in ('deleteMessage', 'deleteMessages'):
+            result = self.delete_message(params)
+        elif method == 'getChatMember':
+            result = self.get_chat_member(params)
+        elif method == 'getChatAdministrators':
+            result = []
+        elif method in ('banChatMember', 'unbanChatMember', 'deleteWebhook',
+                        'setWebhook', 'close', 'logOut'):
+            result = True
+        else:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+        return 200, {'ok': True, 'result': result}
+
+    async def control(self, action: str, params: Dict) -> Tuple[int, Dict]:
+        if action == 'start':
+            self.start_load(int(params.get('chats', 1)), float(params.get('rate', 1)),
+                            int(params.get('users_per_chat', 50)))
+            return 200, {'ok': True}
+        if action == 'backlog':
+            self.queue_backlog(int(params.get('chats', 1)), int(params.get('messages', 100)),
+                               int(params.get('users_per_chat', 50)))
+            return 200, {'ok': True}
+        if action == 'stop':
+            return 200, {'ok': True, 'result': self.stop_load()}
+        return 404, {'ok': False}
+
+    # HTTP plumbing
+
+    @staticmethod
+    def parse_params(content_type: str, body: bytes) -> Dict:
+        if not body:
+            return {}
+        if content_type.startswith('application/json'):
+            return json.loads(body)
+        params = {}
+        for key, value in urllib.parse.parse_qsl(body.decode('utf-8'), keep_blank_values=True):
+            # python-telegram-bot sends non-string values JSON-encoded
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                params = self.parse_params(headers.get('content-type', ''), body)
+
+                # Paths look like /bot<token>/<method> or /_control/<action>
+                parts = urllib.parse.urlparse(path).path.strip('/').split('/')
+                if parts[0] == '_control':
+                    status, payload = await self.control(parts[-1], params)
+                else:
+                    status, payload = await self.call(parts[-1], params)
+
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8081):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(host: str, port: int, latency: float, jitter: float, error_rate: float,
+               retry_after: int = 1):
+    """Run the fake server until interrupted (entry point for a subprocess)."""
+    api = FakeBotAPI(latency, jitter, error_rate, retry_after)
+    try:
+        asyncio.run(api.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Telegram Bot API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help="Added latency per action call (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra latency up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of action calls answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="retry_after value for injected 429s")
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.latency, args.jitter, args.error_rate, args.retry_after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+HTTP Connection Pools for Bot API Traffic
+"""
+
+import math
+import time
+import asyncio
+import logging
+import importlib.util
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import httpx
+from telegram.error import TimedOut
+from telegram._utils.defaultvalue import DefaultValue
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+from config import (
+    HTTP_VERSION, POOL_WAIT_WARNING_THRESHOLD,
+    ACTION_POOL_SIZE, ACTION_KEEPALIVE_CONNECTIONS, ACTION_KEEPALIVE_EXPIRY,
+    ACTION_CONNECT_TIMEOUT, ACTION_READ_TIMEOUT, ACTION_WRITE_TIMEOUT, ACTION_POOL_TIMEOUT,
+    UPDATES_POOL_SIZE, UPDATES_KEEPALIVE_EXPIRY,
+    UPDATES_CONNECT_TIMEOUT, UPDATES_READ_TIMEOUT, UPDATES_WRITE_TIMEOUT, UPDATES_POOL_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+# All pools created by build_requests(), by name
+pools: Dict[str, "PooledHTTPXRequest"] = {}
+
+
+class PoolStats:
+    """Counters for time spent waiting for a free connection slot."""
+
+    def __init__(self, window: int = 1000):
+        self.recent_waits = deque(maxlen=window)
+        self.in_flight = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement window.
+
+        in_flight tracks live requests and is never reset; requests started
+        before the reset still decrement it when they finish.
+        """
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.peak_in_flight = self.in_flight
+        self.recent_waits.clear()
+
+    def record_wait(self, waited: float):
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.recent_waits.append(waited)
+
+    def summary(self) -> Dict:
+        waits = sorted(self.recent_waits)
+        return {
+            'requests': self.requests,
+            'avg_wait': self.total_wait / self.requests if self.requests else 0.0,
+            'p99_wait': waits[max(1, math.ceil(len(waits) * 0.99)) - 1] if waits else 0.0,
+            'max_wait': self.max_wait,
+            'timeouts': self.timeouts,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight
+        }
+
+
+class PooledHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest with configurable keep-alive and pool wait tracking.
+
+    Requests take a slot from a semaphore sized like the connection pool
+    before they are handed to httpx, so the time spent queueing for a
+    connection can be measured and reported.
+    """
+
+    def __init__(self, name: str, connection_pool_size: int, keepalive_connections: int,
+                 keepalive_expiry: float, connect_timeout: float, read_timeout: float,
+                 write_timeout: float, pool_timeout: float, http_version: str = "1.1",
+                 wait_warning_threshold: float = 0.5):
+        super().__init__(
+            connection_pool_size=connection_pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            pool_timeout=pool_timeout,
+            http_version=http_version
+        )
+        # HTTPXRequest does not expose keep-alive settings, so rebuild the client with our limits.
+        # _client_kwargs, _build_client(), _client and DefaultValue are private to python-telegram-bot;
+        # this is tied to the ==20.8 pin in requirements.txt and must be rechecked when upgrading.
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=connection_pool_size,
+            max_keepalive_connections=min(keepalive_connections, connection_pool_size),
+            keepalive_expiry=keepalive_expiry
+        )
+        self._client = self._build_client()
+
+        self.name = name
+        self.pool_size = connection_pool_size
+        self.wait_warning_threshold = wait_warning_threshold
+        self.stats = PoolStats()
+        self._slots = asyncio.Semaphore(connection_pool_size)
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        if isinstance(pool_timeout, DefaultValue):
+            pool_timeout = self._client.timeout.pool
+
+        start = time.monotonic()
+        if not self._slots.locked():
+            # A free slot is taken without yielding, so the wait metric only shows real contention
+            await self._slots.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), pool_timeout)
+            except asyncio.TimeoutError as err:
+                self.stats.timeouts += 1
+                raise TimedOut(
+                    message=f"Pool timeout: all {self.pool_size} '{self.name}' connections are busy."
+                ) from err
+
+        waited = time.monotonic() - start
+        self.stats.record_wait(waited)
+        if waited > self.wait_warning_threshold:
+            logger.warning(f"Waited {waited:.2f}s for a free '{self.name}' connection")
+
+        # httpx only gets what is left of the pool timeout, so the total wait stays within it
+        if pool_timeout is not None:
+            pool_timeout = max(pool_timeout - waited, 0.0)
+
+        self.stats.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+        try:
+            return await super().do_request(
+                url, method, request_data,
+                read_timeout=read_timeout,
+                write_timeout=write_timeout,
+                connect_timeout=connect_timeout,
+                pool_timeout=pool_timeout
+            )
+        finally:
+            self.stats.in_flight -= 1
+            self._slots.release()
+
+
+def resolve_http_version(http_version: str) -> str:
+    """Fall back to HTTP/1.1 if HTTP/2 was requested but h2 is not installed."""
+    if http_version in ("2", "2.0") and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but 'h2' is not installed "
+                       "(pip install \"python-telegram-bot[http2]\"); using HTTP/1.1")
+        return "1.1"
+    return http_version
+
+
+def build_requests() -> Tuple[PooledHTTPXRequest, PooledHTTPXRequest]:
+    """Create the action and updates request objects from config settings.
+
+    Returns (action_request, updates_request). They use separate connection
+    pools, so moderation calls never wait behind the long-poll getUpdates.
+    """
+    http_version = resolve_http_version(HTTP_VERSION)
+
+    action_request = PooledHTTPXRequest(
+        name="actions",
+        connection_pool_size=ACTION_POOL_SIZE,
+        keepalive_connections=ACTION_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=ACTION_KEEPALIVE_EXPIRY,
+        connect_timeout=ACTION_CONNECT_TIMEOUT,
+        read_timeout=ACTION_READ_TIMEOUT,
+        write_timeout=ACTION_WRITE_TIMEOUT,
+        pool_timeout=ACTION_POOL_TIMEOUT,
+        http_version=http_version,
+        wait_warning_threshold=POOL_WAIT_WARNING_THRESHOLD
+    )
+    updates_request = PooledHTTPXRequest(
+        name="updates",
+        connection_pool_size=UPDATES_POOL_SIZE,
+        keepalive_connections=UPDATES_POOL_SIZE,
+        keepalive_expiry=UPDATES_KEEPALIVE_EXPIRY,
+        connect_timeout=UPDATES_CONNECT_TIMEOUT,
+        read_timeout=UPDATES_READ_TIMEOUT,
+        write_timeout=UPDATES_WRITE_TIMEOUT,
+        pool_timeout=UPDATES_POOL_TIMEOUT,
+        http_version=http_version,
+        wait_warning_threshold=POOL_WAIT_WARNING_THRESHOLD
+    )
+
+    pools[action_request.name] = action_request
+    pools[updates_request.name] = updates_request
+    return action_request, updates_request
+
+
+def build_updates_client(poll_timeout: float) -> httpx.AsyncClient:
+    """Create a plain httpx client with the "updates" pool settings.
+
+    Used by the sharded ingress (sharded_bot.py), which forwards raw
+    getUpdates JSON to the workers instead of parsing it into telegram objects.
+    """
+    http_version = resolve_http_version(HTTP_VERSION)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=UPDATES_CONNECT_TIMEOUT,
+            read=poll_timeout + UPDATES_READ_TIMEOUT,
+            write=UPDATES_WRITE_TIMEOUT,
+            pool=UPDATES_POOL_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=UPDATES_POOL_SIZE,
+            max_keepalive_connections=UPDATES_POOL_SIZE,
+            keepalive_expiry=UPDATES_KEEPALIVE_EXPIRY
+        ),
+        http1=http_version == "1.1",
+        http2=http_version != "1.1"
+    )
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """Return a wait-time summary for every pool."""
+    return {name: request.stats.summary() for name, request in pools.items()}
+
+
+def reset_pool_stats():
+    """Reset the counters of every pool."""
+    for request in pools.values():
+        request.stats.reset()
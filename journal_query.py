@@ -0,0 +1,121 @@
+"""
+Offline query tool for the moderation event journal.
+
+Usage examples:
+    python journal_query.py --chat -100123456 --type delete --since 2025-08-01
+    python journal_query.py --since 2025-08-01 --until 2025-08-08 --count
+"""
+
+import os
+import json
+import mmap
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from event_journal import EVENT_TYPES, load_index
+
+
+def parse_date(value: str) -> float:
+    """Parse YYYY-MM-DD or an ISO timestamp (UTC) into epoch seconds."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def journal_dirs(directory: str) -> List[str]:
+    """Return the journal directories under a path.
+
+    Sharded mode writes one journal per worker (worker-<n>); those are
+    queried together with any journal in the directory itself.
+    """
+    dirs = [directory]
+    if os.path.isdir(directory):
+        dirs += sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith('worker-') and os.path.isdir(os.path.join(directory, name))
+        )
+    return dirs
+
+
+def iter_events(directory: str, since: Optional[float] = None,
+                until: Optional[float] = None) -> Iterator[Dict]:
+    """Yield journal events in the given time range.
+
+    The time index is used to skip whole segments, and the remaining segments
+    are memory-mapped rather than read into memory.
+    """
+    index = load_index(directory)
+    for position, entry in enumerate(index):
+        is_last = position == len(index) - 1
+        if entry['first_ts'] is None and not is_last:
+            continue
+        # The active segment's index entry may lag behind, so always scan it
+        if not is_last:
+            if since is not None and entry['last_ts'] < since:
+                continue
+            if until is not None and entry['first_ts'] >= until:
+                continue
+
+        path = os.path.join(directory, entry['segment'])
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            continue
+
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b''):
+                    if not line.endswith(b'\n'):
+                        break  # Partial trailing write
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since is not None and event['ts'] < since:
+                        continue
+                    if until is not None and event['ts'] >= until:
+                        continue
+                    yield event
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the moderation event journal.")
+    parser.add_argument('--dir', default=None, help="Journal directory (default: JOURNAL_DIR from config)")
+    parser.add_argument('--chat', type=int, help="Only events for this chat ID")
+    parser.add_argument('--user', type=int, help="Only events for this user ID")
+    parser.add_argument('--type', choices=EVENT_TYPES, help="Only events of this type")
+    parser.add_argument('--since', help="Start date/time (UTC, inclusive)")
+    parser.add_argument('--until', help="End date/time (UTC, exclusive)")
+    parser.add_argument('--count', action='store_true', help="Print counts per event type instead of events")
+    args = parser.parse_args()
+
+    directory = args.dir
+    if directory is None:
+        from config import JOURNAL_DIR
+        directory = JOURNAL_DIR
+
+    since = parse_date(args.since) if args.since else None
+    until = parse_date(args.until) if args.until else None
+
+    counts = {}
+    events = (event for path in journal_dirs(directory) for event in iter_events(path, since, until))
+    for event in events:
+        if args.chat is not None and event.get('chat_id') != args.chat:
+            continue
+        if args.user is not None and event.get('user_id') != args.user:
+            continue
+        if args.type and event.get('type') != args.type:
+            continue
+
+        if args.count:
+            counts[event['type']] = counts.get(event['type'], 0) + 1
+        else:
+            print(json.dumps(event, ensure_ascii=False))
+
+    if args.count:
+        for event_type in EVENT_TYPES:
+            print(f"{event_type}: {counts.get(event_type, 0)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Full-stack load test for the bot against a local fake Bot API server.
+
+Starts fake_bot_api.py in a separate process, points the bot's Application
+at it with base_url(), and drives N chats x M messages/sec for each requested
+rate. Reports sustained throughput, end-to-end removal latency percentiles,
+event-loop lag, connection pool wait and RSS so the bot's saturation point
+can be found.
+
+With --backlog, it first measures how long startup catch-up takes to clear
+a backlog of that many messages per chat.
+
+Usage:
+    python load_test.py --chats 10 --rates 1,5,10,20 --duration 20
+    python load_test.py --chats 10 --backlog 500 --rates 5
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import resource
+import multiprocessing
+import urllib.request
+from typing import Dict, List
+
+from fake_bot_api import percentile, run_server
+
+LOAD_TEST_TOKEN = "123456:LOAD-TEST-TOKEN"
+
+
+def get_rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS as a fallback (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def control(base: str, action: str, params: Dict = None) -> Dict:
+    """Call a control endpoint of the fake server."""
+    request = urllib.request.Request(
+        f"{base}/_control/{action}",
+        data=json.dumps(params or {}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read()).get('result', {})
+
+
+def wait_for_server(base: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            control(base, 'stop')
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Fake Bot API server at {base} did not start")
+
+
+class LoopLagMonitor:
+    """Sample event-loop lag by measuring how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+        self.rss_peak = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+            self.rss_peak = max(self.rss_peak, get_rss_mb())
+
+    def start(self):
+        self.samples = []
+        self.rss_peak = get_rss_mb()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> Dict:
+        if self._task is not None:
+            self._task.cancel()
+        return {
+            'lag_p50': percentile(self.samples, 50),
+            'lag_p99': percentile(self.samples, 99),
+            'lag_max': max(self.samples) if self.samples else None,
+            'rss_peak_mb': self.rss_peak
+        }
+
+
+def ms(value) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+async def run_load_test(base: str, chats: int, rates: List[float], duration: float,
+                        users_per_chat: int, cooldown: float, log_level: str,
+                        backlog: int = 0) -> List[Dict]:
+    # Keep load-test events out of the real journal; bot.py opens it on import
+    import config
+    config.ENABLE_EVENT_JOURNAL = False
+    import bot
+    from telegram import Update
+    from http_pools import get_pool_stats, reset_pool_stats
+
+    # bot.py configures logging on import; quieten it for the test
+    logging.getLogger().setLevel(getattr(logging, log_level))
+
+    application = bot.build_application(LOAD_TEST_TOKEN, base_url=f"{base}/bot")
+    loop = asyncio.get_running_loop()
+    monitor = LoopLagMonitor()
+    results = []
+
+    async with application:
+        if backlog:
+            await loop.run_in_executor(None, control, base, 'backlog', {
+                'chats': chats, 'messages': backlog, 'users_per_chat': users_per_chat
+            })
+            started = time.monotonic()
+            await bot.catch_up_backlog(application)
+            catch_up_time = time.monotonic() - started
+            backlog_stats = await loop.run_in_executor(None, control, base, 'stop')
+            print(f"Catch-up: {backlog_stats['removed']}/{backlog_stats['generated']} backlog messages "
+                  f"removed in {catch_up_time:.2f}s using {backlog_stats['calls'].get('deleteMessages', 0)} "
+                  f"deleteMessages calls", flush=True)
+            results.append({'chats': chats, 'backlog': backlog, 'catch_up_seconds': catch_up_time,
+                            **backlog_stats})
+
+        print(f"{'offered':>8} {'removed/s':>10} {'backlog':>8} {'p50 ms':>8} {'p90 ms':>8} "
+              f"{'p99 ms':>8} {'lag p99':>8} {'lag max':>8} {'pool p99':>8} {'RSS MB':>8}")
+        await application.start()
+        await application.updater.start_polling(allowed_updates=Update.ALL_TYPES, poll_interval=0.0)
+
+        for rate in rates:
+            await loop.run_in_executor(None, control, base, 'start', {
+                'chats': chats, 'rate': rate, 'users_per_chat': users_per_chat
+            })
+            reset_pool_stats()
+            monitor.start()
+            await asyncio.sleep(duration)
+            loop_stats = monitor.stop()
+            run_stats = await loop.run_in_executor(None, control, base, 'stop')
+
+            result = {'chats': chats, 'rate': rate, 'offered': chats * rate}
+            result.update(run_stats)
+            result.update(loop_stats)
+            result['pools'] = get_pool_stats()
+            results.append(result)
+            print(
+                f"{chats * rate:>8.0f} {result['throughput']:>10.1f} {result['outstanding']:>8} "
+                f"{ms(result['latency_p50']):>8} {ms(result['latency_p90']):>8} "
+                f"{ms(result['latency_p99']):>8} {ms(result['lag_p99']):>8} "
+                f"{ms(result['lag_max']):>8} {ms(result['pools']['actions']['p99_wait']):>8} "
+                f"{result['rss_peak_mb']:>8.1f}",
+                flush=True
+            )
+
+            # Let the backlog drain before the next step
+            await asyncio.sleep(cooldown)
+
+        await application.updater.stop()
+        await application.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the bot against a fake Bot API server.")
+    parser.add_argument('--chats', type=int, default=10, help="Number of chats (N)")
+    parser.add_argument('--rates', default="1,5,10,20", help="Comma-separated messages/sec per chat (M) to step through")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per rate step")
+    parser.add_argument('--cooldown', type=float, default=5.0, help="Seconds between rate steps")
+    parser.add_argument('--users-per-chat', type=int, default=50, help="Distinct senders per chat")
+    parser.add_argument('--port', type=int, default=8081, help="Port for the fake Bot API server")
+    parser.add_argument('--latency', type=float, default=0.0, help="Added latency per action call (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra latency up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of action calls answered with 429")
+    parser.add_argument('--backlog', type=int, default=0, help="Messages per chat queued before startup catch-up")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--log-level', default="WARNING", help="Bot log level during the test")
+    args = parser.parse_args()
+
+    rates = [float(rate) for rate in args.rates.split(',')]
+    base = f"http://127.0.0.1:{args.port}"
+
+    server = multiprocessing.Process(
+        target=run_server,
+        args=('127.0.0.1', args.port, args.latency, args.jitter, args.error_rate),
+        daemon=True
+    )
+    server.start()
+    try:
+        wait_for_server(base)
+        results = asyncio.run(run_load_test(
+            base, args.chats, rates, args.duration, args.users_per_chat, args.cooldown,
+            args.log_level, args.backlog
+        ))
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {os.path.abspath(args.json)}")
+
+
+if __name__ == '__main__':
+    main()
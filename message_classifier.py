@@ -0,0 +1,125 @@
+"""
+Message Classification and Per-Type Policies
+"""
+
+from typing import Dict, List, Optional
+from spam_filter import get_spam_filter
+from config import (
+    ENABLE_FORWARDED_MESSAGE_BLOCKING, FORWARDED_MESSAGE_POLICY, LINK_POLICY,
+    BUTTON_LINK_POLICY, VIA_BOT_POLICY, MEDIA_POLICIES
+)
+
+# Violation types, in the order they are checked
+VIOLATION_FORWARDED = 'forwarded'
+VIOLATION_BUTTON = 'button'
+VIOLATION_LINK = 'link'
+VIOLATION_CAPTION = 'caption'
+VIOLATION_VIA_BOT = 'via_bot'
+VIOLATION_MEDIA = 'media'
+
+# Policies
+POLICY_ALLOW = 'allow'
+POLICY_DELETE = 'delete'  # Remove and post a notice
+POLICY_WARN = 'warn'  # Remove and count a warning (or ban)
+
+# Message attributes that carry media, checked in this order
+MEDIA_TYPES = (
+    'photo', 'video', 'animation', 'audio', 'document', 'sticker', 'voice',
+    'video_note', 'contact', 'location', 'venue', 'poll', 'dice', 'game', 'story'
+)
+
+# Entity types that hide a URL behind other text
+LINK_ENTITY_TYPES = ('text_link', 'url')
+
+
+def has_link_entity(entities) -> bool:
+    """Check message entities for (hidden) links."""
+    for entity in entities:
+        if entity.type in LINK_ENTITY_TYPES:
+            return True
+    return False
+
+
+def get_button_urls(reply_markup) -> List[str]:
+    """Collect URLs from inline keyboard buttons."""
+    if reply_markup is None:
+        return []
+    urls = []
+    for row in reply_markup.inline_keyboard:
+        for button in row:
+            if button.url:
+                urls.append(button.url)
+            elif button.login_url:
+                urls.append(button.login_url.url)
+    return urls
+
+
+def classify_message(message) -> Dict:
+    """Derive everything the policies need from the message object alone.
+
+    Makes a single pass over the message and never calls the Bot API.
+    """
+    spam_filter = get_spam_filter()
+    origin = message.forward_origin
+    media_type = None
+    for attribute in MEDIA_TYPES:
+        if getattr(message, attribute):
+            media_type = attribute
+            break
+
+    return {
+        'forward_origin': origin.type if origin is not None else None,
+        'is_automatic_forward': bool(message.is_automatic_forward),
+        'media_type': media_type,
+        'text_link': bool(message.text) and (
+            has_link_entity(message.entities) or spam_filter.contains_url(message.text)
+        ),
+        'caption_link': bool(message.caption) and (
+            has_link_entity(message.caption_entities) or spam_filter.contains_url(message.caption)
+        ),
+        'button_urls': get_button_urls(message.reply_markup),
+        'via_bot': message.via_bot is not None
+    }
+
+
+def get_policy(violation: str, media_type: Optional[str] = None) -> str:
+    """Return the configured policy for a violation type."""
+    if violation == VIOLATION_FORWARDED:
+        return FORWARDED_MESSAGE_POLICY if ENABLE_FORWARDED_MESSAGE_BLOCKING else POLICY_ALLOW
+    if violation == VIOLATION_BUTTON:
+        return BUTTON_LINK_POLICY
+    if violation in (VIOLATION_LINK, VIOLATION_CAPTION):
+        return LINK_POLICY
+    if violation == VIOLATION_VIA_BOT:
+        return VIA_BOT_POLICY
+    if violation == VIOLATION_MEDIA:
+        return MEDIA_POLICIES.get(media_type, POLICY_ALLOW)
+    return POLICY_ALLOW
+
+
+def find_violation(profile: Dict) -> Optional[Dict]:
+    """Route a classified message through the policies.
+
+    Returns the first violation whose policy is not "allow", as
+    {'type': ..., 'policy': ..., 'media_type': ...}, or None.
+    """
+    candidates = []
+    # Channel posts mirrored into their linked discussion group are not user forwards
+    if profile['forward_origin'] and not profile['is_automatic_forward']:
+        candidates.append(VIOLATION_FORWARDED)
+    if profile['button_urls']:
+        candidates.append(VIOLATION_BUTTON)
+    if profile['text_link']:
+        candidates.append(VIOLATION_LINK)
+    if profile['caption_link']:
+        candidates.append(VIOLATION_CAPTION)
+    if profile['via_bot']:
+        candidates.append(VIOLATION_VIA_BOT)
+    if profile['media_type']:
+        candidates.append(VIOLATION_MEDIA)
+
+    for violation in candidates:
+        policy = get_policy(violation, profile['media_type'])
+        if policy != POLICY_ALLOW:
+            return {'type': violation, 'policy': policy, 'media_type': profile['media_type']}
+    return None
@@ -0,0 +1,177 @@
+"""
+Startup Timing and Live Profiling
+"""
+
+import os
+import time
+import signal
+import asyncio
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Tuple
+
+
+class StartupTimer:
+    """Record how long each startup phase takes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        """End the current phase and start the next one."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def summary(self) -> str:
+        parts = [f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in self.phases]
+        parts.append(f"total {(self.last - self.started) * 1000:.1f}ms")
+        return ", ".join(parts)
+
+
+class StackSampler:
+    """Sampling CPU profiler for the main thread.
+
+    An ITIMER_PROF timer raises SIGPROF every `interval` seconds of CPU time
+    used by the process. The handler runs on the main thread (the event loop)
+    and records the interrupted stack, so samples land where CPU is actually
+    spent; time spent idle in select() produces no samples.
+
+    Python only runs the handler between bytecodes, so the signals raised
+    during one long C call arrive as a single one. Each sample is therefore
+    weighted by the CPU time used since the previous one; `stacks` maps each
+    stack to CPU microseconds.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._previous_handler = None
+        self._last_cpu = 0.0
+
+    def _handle(self, signum, frame):
+        now = time.process_time()
+        weight = int((now - self._last_cpu) * 1_000_000)
+        self._last_cpu = now
+
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[";".join(stack)] += weight
+        self.samples += 1
+
+    def start(self):
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError("CPU profiling needs signal.setitimer (not available on this platform)")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("CPU profiling must run on the main thread")
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle)
+        self._last_cpu = time.process_time()
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> Counter:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        return self.stacks
+
+
+def format_cpu_summary(stacks: Counter, samples: int, interval: float, duration: float,
+                       limit: int = 30) -> str:
+    """Top functions by self and total CPU time."""
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+
+    cpu_time = sum(stacks.values()) / 1_000_000
+    total = max(sum(stacks.values()), 1)
+    lines = [
+        f"{samples} samples every {interval * 1000:g}ms of CPU time: {cpu_time:.2f}s CPU "
+        f"in {duration:.1f}s ({cpu_time / duration:.0%} of one core)",
+        "",
+        "Top functions by self time (CPU ms):"
+    ]
+    for frame, count in self_counts.most_common(limit):
+        lines.append(f"{count / 1000:>10.1f} {count / total:>7.1%}  {frame}")
+    lines += ["", "Top functions by total time (CPU ms):"]
+    for frame, count in total_counts.most_common(limit):
+        lines.append(f"{count / 1000:>10.1f} {count / total:>7.1%}  {frame}")
+    return "\n".join(lines) + "\n"
+
+
+# Only one profile may run at a time
+_profile_running = False
+
+
+def is_profile_running() -> bool:
+    return _profile_running
+
+
+async def profile_event_loop(duration: float, output_dir: str, interval: float = 0.005,
+                             tracemalloc_frames: int = 10) -> Dict[str, str]:
+    """Profile the running event loop for `duration` seconds and write the results.
+
+    Writes a collapsed-stack file (flame graph input), a CPU summary, a
+    tracemalloc snapshot and a top-allocations summary to `output_dir`.
+    Allocations are tracked from the start of the window only.
+    Returns the written file paths by kind.
+    """
+    global _profile_running
+    if _profile_running:
+        raise RuntimeError("A profile is already running")
+    _profile_running = True
+
+    was_tracing = tracemalloc.is_tracing()
+    try:
+        sampler = StackSampler(interval)
+        sampler.start()
+        if not was_tracing:
+            tracemalloc.start(tracemalloc_frames)
+        started = time.monotonic()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stacks = sampler.stop()
+            elapsed = time.monotonic() - started
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__)
+            ])
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        _profile_running = False
+
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+    paths = {
+        'stacks': prefix + ".folded",
+        'cpu': prefix + "-cpu.txt",
+        'snapshot': prefix + ".tracemalloc",
+        'memory': prefix + "-memory.txt"
+    }
+
+    with open(paths['stacks'], 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(paths['cpu'], 'w') as f:
+        f.write(format_cpu_summary(stacks, sampler.samples, interval, elapsed))
+
+    snapshot.dump(paths['snapshot'])
+    with open(paths['memory'], 'w') as f:
+        top = snapshot.statistics('lineno')
+        f.write(f"{sum(stat.size for stat in top) / 1024:.1f} KiB traced in {len(top)} locations\n\n")
+        for stat in top[:30]:
+            f.write(f"{stat}\n")
+
+    return paths
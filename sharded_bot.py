@@ -0,0 +1,227 @@
+"""
+Sharded Multi-Process Mode
+
+One ingress process long-polls getUpdates and routes every update by chat ID
+to one of N worker processes over multiprocessing queues. Each worker runs the
+normal handlers (bot.build_application) without an Updater. All updates of a
+chat go to the same worker, which processes them in order, so per-chat
+ordering holds while different chats run on different cores.
+
+Ingress polls through the same "updates" connection pool as single-process
+mode (http_pools.py). At startup it fetches the downtime backlog and hands
+each worker its chats' share, which the worker moderates in bulk
+(bot.moderate_backlog) before any live updates.
+
+Warnings and cached admin status live in a shared SQLite store
+(SHARD_STORE_PATH). Each worker writes its own event journal under
+JOURNAL_DIR/worker-<n>; a chat always lands on the same worker, so /stats
+stays complete per chat.
+
+Usage:
+    python sharded_bot.py --workers 4
+"""
+
+import os
+import json
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from typing import Dict, List
+
+import httpx
+from config import (
+    SHARD_WORKERS, SHARD_STORE_PATH, SHARD_POLL_TIMEOUT, ENABLE_CATCH_UP
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.telegram.org/bot"
+
+# Kinds of batches sent to the workers
+BATCH_LIVE = 'live'
+BATCH_BACKLOG = 'backlog'
+
+
+def get_update_chat_id(data: Dict) -> int:
+    """Find the chat (or, failing that, the sender) an update belongs to."""
+    for value in data.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        sender = value.get('from') or value.get('user')
+        if sender:
+            return sender['id']
+    return 0
+
+
+def shard_for(data: Dict, workers: int) -> int:
+    """Return the worker index for an update."""
+    return get_update_chat_id(data) % workers
+
+
+# Worker side
+
+async def worker_main(bot, queue, token: str, base_url: str):
+    from telegram import Update
+
+    application = bot.build_application(token, base_url, polling=False)
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        while True:
+            item = await loop.run_in_executor(None, queue.get)
+            if item is None:
+                break
+            kind, batch = item
+            updates = [Update.de_json(data, application.bot) for data in batch]
+            if kind == BATCH_BACKLOG:
+                await bot.moderate_backlog(application, updates)
+                continue
+            for update in updates:
+                await application.update_queue.put(update)
+        await application.stop()
+
+
+def run_worker(index: int, queue, token: str, base_url: str, store_path: str, journal: bool,
+               log_level: str = None):
+    """Entry point of a worker process."""
+    # Shutdown is driven by the ingress process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import bot
+    from shared_store import SqliteStore
+
+    if log_level:
+        logging.getLogger().setLevel(getattr(logging, log_level))
+
+    bot.store = SqliteStore(store_path)
+    bot.journal_dir = os.path.join(bot.journal_dir, f"worker-{index}") if journal and bot.journal_dir else None
+
+    try:
+        asyncio.run(worker_main(bot, queue, token, base_url))
+    finally:
+        if bot.event_journal is not None:
+            bot.event_journal.close()
+        bot.store.close()
+
+
+# Ingress side
+
+def dispatch(queues: List, updates: List[Dict], kind: str = BATCH_LIVE):
+    """Send each worker its share of the updates, one queue message per worker."""
+    batches = [[] for _ in queues]
+    for data in updates:
+        batches[shard_for(data, len(queues))].append(data)
+    for queue, batch in zip(queues, batches):
+        if batch:
+            queue.put((kind, batch))
+
+
+async def ingress(token: str, base_url: str, queues: List, poll_timeout: int, log_level: str = None):
+    """Long-poll getUpdates and hand each update to its chat's worker."""
+    import bot
+    from telegram import Bot, Update
+    from http_pools import build_requests, build_updates_client
+
+    if log_level:
+        logging.getLogger().setLevel(getattr(logging, log_level))
+
+    url = f"{base_url}{token}"
+    async with build_updates_client(poll_timeout) as client:
+        await client.post(f"{url}/deleteWebhook")
+
+        offset = None
+        if ENABLE_CATCH_UP:
+            # Fetched through a Bot so the acknowledgement rules of bot.fetch_backlog apply;
+            # the workers moderate their share before any live updates
+            action_request, updates_request = build_requests()
+            async with Bot(token, base_url=base_url, request=action_request,
+                           get_updates_request=updates_request) as catch_up_bot:
+                backlog = await bot.fetch_backlog(catch_up_bot)
+            if backlog:
+                logger.info(f"Routing a backlog of {len(backlog)} updates to the workers")
+                dispatch(queues, [update.to_dict() for update in backlog], BATCH_BACKLOG)
+                offset = backlog[-1].update_id + 1
+
+        while True:
+            params = {'timeout': poll_timeout, 'allowed_updates': json.dumps(Update.ALL_TYPES)}
+            if offset is not None:
+                params['offset'] = offset
+            try:
+                response = await client.post(f"{url}/getUpdates", data=params)
+                payload = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Error polling updates: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not payload.get('ok'):
+                retry_after = payload.get('parameters', {}).get('retry_after', 1)
+                logger.error(f"getUpdates failed: {payload.get('description')}")
+                await asyncio.sleep(retry_after)
+                continue
+
+            if payload['result']:
+                offset = payload['result'][-1]['update_id'] + 1
+                dispatch(queues, payload['result'])
+
+
+async def ingress_main(token: str, base_url: str, queues: List, poll_timeout: int,
+                       log_level: str = None):
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    try:
+        await ingress(token, base_url, queues, poll_timeout, log_level)
+    except asyncio.CancelledError:
+        logger.info("Ingress stopped")
+
+
+def run_sharded(token: str, base_url: str = DEFAULT_BASE_URL, workers: int = SHARD_WORKERS,
+                store_path: str = SHARD_STORE_PATH, poll_timeout: int = SHARD_POLL_TIMEOUT,
+                journal: bool = True, log_level: str = None):
+    """Start the workers and run the ingress loop until SIGINT/SIGTERM."""
+    context = multiprocessing.get_context('spawn')
+    queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(
+            target=run_worker,
+            args=(index, queues[index], token, base_url, store_path, journal, log_level),
+            name=f"bot-worker-{index}"
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    logger.info(f"Starting sharded bot with {workers} workers...")
+    try:
+        asyncio.run(ingress_main(token, base_url, queues, poll_timeout, log_level))
+    finally:
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as one ingress and N worker processes.")
+    parser.add_argument('--workers', type=int, default=SHARD_WORKERS, help="Number of worker processes")
+    parser.add_argument('--store', default=SHARD_STORE_PATH, help="Path of the shared SQLite store")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help="Bot API base URL")
+    args = parser.parse_args()
+
+    import bot
+    token = bot.get_token()
+    if not token:
+        return
+    run_sharded(token, args.base_url, args.workers, args.store)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Warning and Admin State Storage
+"""
+
+import time
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+
+class MemoryStore:
+    """In-process state, used when the bot runs as a single process."""
+
+    def __init__(self):
+        self.warnings: Dict[int, int] = {}  # {user_id: warning_count}
+        self.members: Dict[Tuple[int, int], Tuple[str, float]] = {}  # {(chat_id, user_id): (status, checked_at)}
+        self._members_pruned_at = time.time()
+
+    def get_warnings(self, user_id: int) -> int:
+        return self.warnings.get(user_id, 0)
+
+    def add_warnings(self, user_id: int, count: int = 1) -> int:
+        self.warnings[user_id] = self.warnings.get(user_id, 0) + count
+        return self.warnings[user_id]
+
+    def clear_warnings(self, user_id: int):
+        self.warnings.pop(user_id, None)
+
+    def reset_warnings(self):
+        self.warnings.clear()
+
+    def count_warned_users(self) -> int:
+        return len(self.warnings)
+
+    def get_member_status(self, chat_id: int, user_id: int, max_age: float) -> Optional[str]:
+        cached = self.members.get((chat_id, user_id))
+        if cached is None or time.time() - cached[1] > max_age:
+            return None
+        return cached[0]
+
+    def set_member_status(self, chat_id: int, user_id: int, status: str, max_age: float):
+        now = time.time()
+        self.members[(chat_id, user_id)] = (status, now)
+        # Sweep expired entries at most once per max_age
+        if now - self._members_pruned_at >= max_age:
+            self.members = {key: value for key, value in self.members.items() if now - value[1] <= max_age}
+            self._members_pruned_at = now
+
+
+class SqliteStore:
+    """State shared between worker processes through a local SQLite file.
+
+    Uses WAL mode so readers in one worker do not block writers in another.
+    Every call is a short transaction, cheap enough to run on the event loop.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS warnings (
+            user_id INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS members (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._members_pruned_at = time.time()
+
+    def get_warnings(self, user_id: int) -> int:
+        row = self.conn.execute("SELECT count FROM warnings WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def add_warnings(self, user_id: int, count: int = 1) -> int:
+        # Increment and read back in one write transaction, so concurrent workers never lose a warning
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT INTO warnings (user_id, count) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET count = count + excluded.count",
+                (user_id, count)
+            )
+            total = self.conn.execute("SELECT count FROM warnings WHERE user_id = ?", (user_id,)).fetchone()[0]
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return total
+
+    def clear_warnings(self, user_id: int):
+        self.conn.execute("DELETE FROM warnings WHERE user_id = ?", (user_id,))
+
+    def reset_warnings(self):
+        self.conn.execute("DELETE FROM warnings")
+
+    def count_warned_users(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM warnings").fetchone()[0]
+
+    def get_member_status(self, chat_id: int, user_id: int, max_age: float) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT status FROM members WHERE chat_id = ? AND user_id = ? AND checked_at >= ?",
+            (chat_id, user_id, time.time() - max_age)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_member_status(self, chat_id: int, user_id: int, status: str, max_age: float):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO members (chat_id, user_id, status, checked_at) VALUES (?, ?, ?, ?)",
+            (chat_id, user_id, status, now)
+        )
+        # Sweep expired rows at most once per max_age (per worker)
+        if now - self._members_pruned_at >= max_age:
+            self.conn.execute("DELETE FROM members WHERE checked_at < ?", (now - max_age,))
+            self._members_pruned_at = now
+
+    def close(self):
+        self.conn.close()
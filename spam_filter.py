@@ -32,6 +32,8 @@ class SpamFilter:
         # Compile regex patterns for better performance
         self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) 
                                 for pattern in self.url_patterns]
+        # Single alternation for quick "any link?" checks
+        self.combined_pattern = re.compile('|'.join(self.url_patterns), re.IGNORECASE)
     
     def extract_urls(self, text: str) -> List[str]:
         """Extract all URLs from text."""
@@ -56,6 +58,12 @@ class SpamFilter:
         
         return urls
     
+    def contains_url(self, text: str) -> bool:
+        """Check if text contains any URL, without extracting them all."""
+        if not text:
+            return False
+        return self.combined_pattern.search(text) is not None
+    
     def get_domain(self, url: str) -> str:
         """Extract domain from URL."""
         try:
@@ -192,5 +200,18 @@ class SpamFilter:
         return warning
 
 
-# Global spam filter instance
-spam_filter = SpamFilter() 
\ No newline at end of file
+# Global spam filter instance, built on first use
+_spam_filter = None
+
+def get_spam_filter() -> SpamFilter:
+    """Return the global spam filter, building it on first use."""
+    global _spam_filter
+    if _spam_filter is None:
+        _spam_filter = SpamFilter()
+    return _spam_filter
+
+def __getattr__(name: str):
+    # Keeps `from spam_filter import spam_filter` working
+    if name == 'spam_filter':
+        return get_spam_filter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file